@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# aac_popgen/__init__.py
+''' The library behind the scripts of this project, for use from other Python
+code without running the scripts:
+
+    clc         reading and summarizing CLC amino acid change exports
+    genotypes   reading and encoding genotype tables and distance matrices
+    reconstruct reconstructing reference homozygotes from read depth
+    filtering   filtering loci and samples by missing data
+    groups      reading groups CSVs and group membership of alleles
+    distance    pairwise Jaccard distances, with checkpointing
+    popstats    per-group population statistics and Fst
+    tree        UPGMA and neighbour-joining trees
+    pca         PCA and k-means clustering of a distance matrix
+    profiling   per-phase time and memory measurement
+
+Importing the package is cheap: the names below are only imported from their
+module when first used, scipy and scikit-learn are only imported by the
+functions that need them, and nothing in the package imports a plotting
+library. These are slow to import, so the scripts likewise only import
+matplotlib, seaborn and upsetplot once they render a plot.
+'''
+
+import importlib
+
+
+_EXPORTS = {
+    'open_csv': 'clc',
+    'summarize_files': 'clc',
+    'write_summary': 'clc',
+    'read_genotypes': 'genotypes',
+    'sample_columns': 'genotypes',
+    'encode_genotypes': 'genotypes',
+    'read_dist': 'genotypes',
+    'read_depth': 'reconstruct',
+    'reconstruct_ref_homs': 'reconstruct',
+    'filter_genotypes': 'filtering',
+    'read_groups': 'groups',
+    'read_sample_groups': 'groups',
+    'csv_to_pca_groups_df': 'groups',
+    'allele_membership': 'groups',
+    'csv_to_pairwise_dist': 'distance',
+    'pairwise_dist': 'distance',
+    'jaccard_distance': 'distance',
+    'jaccard_index': 'distance',
+    'population_stats': 'popstats',
+    'upgma': 'tree',
+    'neighbor_joining': 'tree',
+    'to_newick': 'tree',
+    'standardize': 'pca',
+    'fit_pca': 'pca',
+    'components_for_variance': 'pca',
+    'fit_kmeans': 'pca',
+    'Profiler': 'profiling',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        module = importlib.import_module(f'{__name__}.{_EXPORTS[name]}')
+        return getattr(module, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
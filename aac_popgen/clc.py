@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# aac_popgen/clc.py
+''' Reading CLC Genomics Workbench amino acid change exports and summarizing
+them as a single genotype table. Only uses the standard library, so it is
+quick to import.
+'''
+
+import csv
+import gzip
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+from aac_popgen.profiling import Profiler
+
+
+# the columns of a genotype table that describe the locus, followed by one
+# column for each sample
+META_COLUMNS = [
+    'reference_name',
+    'reference_pos',
+    'reference_allele',
+    'sample_allele',
+    'amino_acid_change'
+]
+
+# mapping name -> locus -> row of the genotype table
+Changes = Dict[str, Dict[Tuple[str, ...], Dict[str, str]]]
+
+
+def open_csv(
+        filename: Path,
+        *,
+        newline: 'Union[None,str]'=None
+        ) -> 'io.TextWrapper':
+    ''' Open `filename` with gzip if it seems compressed,
+    otherwise just open the file.'''
+    if '.gz' in filename.suffixes:
+        fin = gzip.open(filename, mode='rt', newline=newline)
+    else:
+        fin = open(filename, newline=newline)
+    return fin
+
+def summarize_files(
+        filenames: List[Path],
+        *,
+        coverage_cutoff: int=10,
+        keep_silent: bool=False,
+        default_name: str='',
+        show_in_depth: bool=False,
+        profiler: Profiler=None
+        ) -> Tuple[List[str], Changes]:
+    ''' Summarizes the CLC exports `filenames`, one per sample, as the rows of
+    a genotype table. Changes with less than `coverage_cutoff` coverage, and
+    silent changes unless `keep_silent` is set, are left out. If
+    `show_in_depth` is set, rows hold zygosity and allele frequencies rather
+    than genotypes.
+
+    Returns the headers of the table and its rows, by mapping name and locus.'''
+    if profiler == None:
+        profiler = Profiler()
+    headers = list(META_COLUMNS)
+    header_friendly_filenames = [str(Path(f).stem) for f in filenames]
+    headers.extend(sorted(header_friendly_filenames))
+
+    changes = {}
+    with profiler.phase('read') as phase:
+        for filename in filenames:
+            with open_csv(filename, newline='') as fin:
+                reader = csv.DictReader(fin, delimiter=',', quotechar='"')
+                for row in reader:
+                    phase.count(1)
+                    coverage = int(row.get('Coverage', 0))
+                    if coverage < coverage_cutoff:
+                        continue
+
+                    amino_change = row.get('Amino acid change', '')
+                    if (keep_silent is False) and (amino_change == ''):
+                        continue
+                    amino_change = amino_change.split('p.')[-1].strip('[]')
+
+                    mapping_name = row.get('Mapping', '')
+                    if mapping_name == '':
+                            mapping_name = default_name
+
+                    info = {
+                        'reference_name': mapping_name,
+                        'reference_pos': row.get('Reference Position'),
+                        'reference_allele': row.get('Reference'),
+                        'sample_allele': row.get('Allele'),
+                        'amino_acid_change': amino_change
+                    }
+
+                    # change the pertinent info into a hashable type
+                    info_hash = tuple(info.values())
+
+                    zygosity = row.get('Zygosity', 'N/A')[:3]
+                    count = int(row.get('Count', 0))
+                    frequency = round(float(row.get('Frequency', 0)), 3)
+                    in_depth = f'{zygosity}:{count}/{coverage}({frequency})'
+
+                    if changes.get(mapping_name) == None:
+                        changes[mapping_name] = {}
+
+                    if info_hash not in changes[mapping_name]:
+                        changes[mapping_name][info_hash] = info
+
+                    if show_in_depth:
+                        changes[mapping_name][info_hash][str(Path(filename).stem)] = in_depth
+                    else:
+                        if zygosity == 'Hom':
+                            symbol = '11'
+                        else:
+                            symbol = '10'
+                        changes[mapping_name][info_hash][str(Path(filename).stem)] = symbol
+    return headers, changes
+
+def write_summary(
+        output: Union[str, Path],
+        headers: List[str],
+        changes: Changes,
+        *,
+        split: bool=False,
+        profiler: Profiler=None
+        ):
+    ''' Writes the genotype table summarized by summarize_files to `output`,
+    sorted by mapping name and position. If `split` is set, the rows of every
+    mapping name are also written to their own file.'''
+    if profiler == None:
+        profiler = Profiler()
+    with profiler.phase('write') as phase:
+        with open(output, 'w', newline='') as fout:
+            writer = csv.DictWriter(fout, fieldnames=headers, quotechar='"')
+            writer.writeheader()
+            sorted_mapping_names = sorted(list(changes.keys()))
+            for mapping_name in sorted_mapping_names:
+                by_mapping = changes[mapping_name]
+                hashes_by_ref_pos = sorted(by_mapping, key=lambda x: int(x[1]))
+                if split == True:
+                    split_fn = str(output).rstrip('.csv')
+                    split_fn += '_'
+                    split_fn += mapping_name.replace(' ', '_')
+                    split_fn += '.csv'
+                    split_out = open(split_fn, 'w', newline='')
+                    split_writer = csv.DictWriter(
+                        split_out,
+                        fieldnames=headers,
+                        quotechar='"'
+                    )
+                    split_writer.writeheader()
+                for info_hash in hashes_by_ref_pos:
+                    row = changes[mapping_name][info_hash]
+                    writer.writerow(row)
+                    phase.count(1)
+                    if split == True:
+                        split_writer.writerow(row)
+                if split == True:
+                    split_out.close()
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+# aac_popgen/distance.py
+''' Pairwise Jaccard distances between the samples of a genotype table, with
+checkpointing so long runs can be resumed.'''
+
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Union
+
+import pandas as pd
+
+from aac_popgen.genotypes import read_genotypes, sample_columns
+from aac_popgen.profiling import Profiler
+
+
+class CheckpointError(ValueError):
+    ''' Raised when a checkpoint cannot be resumed from.'''
+
+
+def csv_to_pairwise_dist(
+        file_in: Union[str, Path],
+        columns: List[str]=None,
+        compare: Callable[[str, str], float]=None,
+        checkpoint: Union[str, Path]=None,
+        checkpoint_interval: float=600.0,
+        resume: bool=False,
+        progress: bool=False,
+        profiler: Profiler=None
+        ) -> pd.DataFrame:
+    ''' Returns the pairwise distances between the samples of the genotype
+    table in `file_in`. See pairwise_dist for the other arguments.'''
+    if profiler == None:
+        profiler = Profiler()
+    with profiler.phase('read') as phase:
+        df = read_genotypes(file_in)
+        phase.count(len(df))
+    return pairwise_dist(
+        df,
+        columns=columns,
+        compare=compare,
+        checkpoint=checkpoint,
+        checkpoint_interval=checkpoint_interval,
+        resume=resume,
+        progress=progress,
+        profiler=profiler
+    )
+
+def pairwise_dist(
+        df: pd.DataFrame,
+        columns: List[str]=None,
+        compare: Callable[[str, str], float]=None,
+        checkpoint: Union[str, Path]=None,
+        checkpoint_interval: float=600.0,
+        resume: bool=False,
+        progress: bool=False,
+        profiler: Profiler=None
+        ) -> pd.DataFrame:
+    ''' Returns the pairwise distances between the samples of the genotype
+    table `df`, or between its `columns` if given.
+
+    If `checkpoint` is given, completed sample rows are saved to it at most
+    every `checkpoint_interval` seconds, and if `resume` is set, rows already
+    saved in it are loaded instead of being recomputed. If `progress` is set,
+    progress and an estimated time remaining are reported on stderr.
+    The compute phase is measured by `profiler`, if given.'''
+    if compare == None:
+        compare = jaccard_distance
+    if profiler == None:
+        profiler = Profiler()
+    if columns == None:
+        columns = sample_columns(df)
+    intersection = df.columns.intersection(columns)
+    # this particular comprehension preserves the order of the columns provided in the resulting df
+    df = df.loc[:, [c for c in columns if c in intersection]]
+
+    completed = {}
+    if checkpoint != None:
+        digest = table_hash(df)
+        if resume == True and Path(checkpoint).exists():
+            completed = load_checkpoint(checkpoint, digest)
+            if progress == True:
+                print(f'Resuming from {checkpoint}: {len(completed)}/{len(df.columns)} samples already done', file=sys.stderr)
+        else:
+            start_checkpoint(checkpoint, digest)
+
+    with profiler.phase('compute') as phase:
+        pairwise = {}
+        unsaved = []
+        total = len(df.columns)
+        todo = total - sum(1 for s in df.columns if s in completed)
+        done = 0
+        start = time.monotonic()
+        last_save = start
+        last_report = start
+        for sample1 in df.columns:
+            if sample1 in completed:
+                pairwise[sample1] = completed[sample1]
+                continue
+            pairwise[sample1] = {}
+            s1 = df[sample1]
+            for sample2 in df.columns:
+                s2 = df[sample2]
+                pairwise[sample1][sample2] = compare(s1, s2)
+            unsaved.append(sample1)
+            done += 1
+            phase.count(total)
+            now = time.monotonic()
+            if progress == True and (now - last_report >= 1.0 or done == todo):
+                last_report = now
+                elapsed = now - start
+                eta = elapsed / done * (todo - done)
+                print(f'{len(pairwise)}/{total} samples, elapsed {elapsed:.0f}s, ETA {eta:.0f}s', file=sys.stderr)
+            if checkpoint != None and now - last_save >= checkpoint_interval:
+                save_checkpoint(checkpoint, {s: pairwise[s] for s in unsaved})
+                unsaved = []
+                last_save = now
+        if checkpoint != None and len(unsaved) > 0:
+            save_checkpoint(checkpoint, {s: pairwise[s] for s in unsaved})
+    df = pd.DataFrame.from_dict(pairwise)
+    df.index.name = 'sample'
+    return df
+
+def table_hash(df: pd.DataFrame) -> str:
+    ''' Returns a hash identifying the contents and columns of `df`.'''
+    digest = hashlib.sha256()
+    digest.update('\0'.join(str(c) for c in df.columns).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def start_checkpoint(checkpoint: Union[str, Path], digest: str):
+    ''' Starts an empty `checkpoint` for an input with `digest`. The checkpoint
+    is a JSON lines file: a header holding the hash, then one line per
+    completed sample row, so every save only appends the new rows.'''
+    checkpoint = Path(checkpoint)
+    tmp = checkpoint.with_name(checkpoint.name + '.tmp')
+    with open(tmp, 'w') as fout:
+        fout.write(json.dumps({'hash': digest}) + '\n')
+    os.replace(tmp, checkpoint)
+
+def load_checkpoint(checkpoint: Union[str, Path], digest: str) -> Dict[str, Dict[str, float]]:
+    ''' Returns the completed sample rows stored in `checkpoint`,
+    which must have been made from an input with the same `digest`.
+
+    A last row cut short by an interrupted save is dropped from the file, so
+    later saves append after the last complete row.'''
+    rows = {}
+    with open(checkpoint, 'rb') as fin:
+        header = fin.readline()
+        try:
+            state = json.loads(header)
+        except ValueError:
+            state = {}
+        if not header.endswith(b'\n') or state.get('hash') != digest:
+            raise CheckpointError(f'Checkpoint {checkpoint} was not made from this input table and columns')
+        good = len(header)
+        for line in fin:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                raise CheckpointError(f'Checkpoint {checkpoint} is corrupt at byte {good}')
+            rows[record['sample']] = record['row']
+            good += len(line)
+    if good < os.path.getsize(checkpoint):
+        os.truncate(checkpoint, good)
+    return rows
+
+def save_checkpoint(checkpoint: Union[str, Path], rows: Dict[str, Dict[str, float]]):
+    ''' Appends the newly completed sample `rows` to `checkpoint`, and makes
+    sure they reach the disk before returning.'''
+    with open(checkpoint, 'a') as fout:
+        for sample, row in rows.items():
+            fout.write(json.dumps({'sample': sample, 'row': row}) + '\n')
+        fout.flush()
+        os.fsync(fout.fileno())
+
+def jaccard_distance(sample1, sample2) -> float:
+    ''' Returns the Jaccard distance between two samples,
+    defined as 1 - J where J is the Jaccard index'''
+    index = jaccard_index(sample1, sample2)
+    distance = 1 - index
+    return distance
+
+def jaccard_index(sample1, sample2) -> float:
+    ''' Returns the Jaccard index of mutations between two samples'''
+    loci = 0
+    similar = 0
+    for (a, b) in zip(sample1, sample2):
+        try:
+            if math.isnan(a):
+                continue
+        except TypeError:
+                pass
+        try:
+            if math.isnan(b):
+                continue
+        except TypeError:
+                pass
+        # ignore wt-wt matches
+        if a == '00' and b == '00':
+            continue
+        loci += 1
+        if a == b:
+            similar += 1
+    if loci == 0:
+        return float('NaN')
+    index = float(similar / loci)
+    return index
+
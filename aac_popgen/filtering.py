@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# aac_popgen/filtering.py
+''' Filtering loci and samples of a genotype table by missing data.'''
+
+import math
+from typing import Dict, Tuple
+
+import pandas as pd
+
+from aac_popgen.clc import META_COLUMNS
+
+
+def filter_genotypes(
+        gt: pd.DataFrame,
+        loci_thresh: float,
+        sample_thresh: float,
+        drop_n: bool=False
+        ) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    ''' Drops loci present in less than `loci_thresh` of the samples, then
+    samples present in less than `sample_thresh` of the remaining loci, then
+    loci without any mutant genotype. If `drop_n` is set, changes stemming from
+    Ns in the reference sequence are dropped first.
+
+    Returns the filtered table and the counts behind the filter, as printed by
+    filter.py.'''
+    pre_len = gt.shape
+
+    # remove changes stemming from Ns in the reference sequence
+    if drop_n == True:
+        gt = gt[gt['reference_allele'] != 'N']
+    num_n_loci = pre_len[0] - gt.shape[0]
+
+    # loci are dropped before samples, assuming that samples are more complete
+    # than loci.
+    # drop loci (rows) if they are in too few samples
+    samples = gt.columns[len(META_COLUMNS):]
+    num_thresh_cols = len(samples)
+    _loci_thresh = int(math.ceil(num_thresh_cols * loci_thresh))
+    gt = gt.dropna(axis='index', thresh=_loci_thresh, subset=samples)
+
+    # drop samples (columns) if they have too few loci
+    num_thresh_rows = len(gt.index)
+    _sample_thresh = int(math.ceil(num_thresh_rows * sample_thresh))
+    _gt = gt.dropna(axis='columns', thresh=_sample_thresh)
+
+    # the change column was likely dropped because we can't change the behavior
+    # of df.dropna, so insert it back in if it's missing
+    try:
+        _gt.insert(2, 'amino_acid_change', gt['amino_acid_change'])
+    except ValueError:
+        pass
+    finally:
+        gt = _gt
+
+    # remove loci that have no mutant samples
+    pre_empty = gt.shape[0]
+    gt = gt[~(gt[gt.columns[len(META_COLUMNS):]].fillna('00') == '00').all(axis=1)]
+    num_no_mutant = pre_empty - gt.shape[0]
+
+    stats = {
+        'num_n_loci': num_n_loci,
+        'num_no_mutant': num_no_mutant,
+        'loci_thresh': _loci_thresh,
+        'num_thresh_cols': num_thresh_cols,
+        'sample_thresh': _sample_thresh,
+        'num_thresh_rows': num_thresh_rows,
+    }
+    return gt, stats
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# aac_popgen/genotypes.py
+''' Reading and encoding genotype tables (as produced by summarize_aac.py) and
+pairwise distance matrices (as produced by jaccard.py).
+
+In a genotype table, every sample has a column of genotypes, encoded as 00
+(homozygous reference), 10 (heterozygous), 11 (homozygous alternate) or empty
+(no information).
+'''
+
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+from aac_popgen.clc import META_COLUMNS
+
+
+MISSING = -1
+# number of alternate alleles represented by each genotype code
+ALT_ALLELES = {'00': 0, '10': 1, '11': 2}
+
+
+def read_genotypes(file_in: Union[str, Path]) -> pd.DataFrame:
+    ''' Returns the genotype table in `file_in`, with every value as a string
+    and empty genotypes as NaN.'''
+    return pd.read_csv(file_in, dtype=str)
+
+def sample_columns(df: pd.DataFrame) -> pd.Index:
+    ''' Returns the sample columns of the genotype table `df`.'''
+    return df.columns[len(META_COLUMNS):]
+
+def encode_genotypes(df: pd.DataFrame) -> np.ndarray:
+    ''' Encodes a table of genotype strings as an int8 array of alternate
+    allele counts. Empty or unrecognized genotypes are encoded as MISSING.'''
+    values = df.to_numpy(dtype=object)
+    codes = np.full(values.shape, MISSING, dtype=np.int8)
+    for genotype, alt in ALT_ALLELES.items():
+        codes[values == genotype] = alt
+    return codes
+
+def read_dist(dist_file: Union[str, Path]) -> pd.DataFrame:
+    ''' Returns the symmetric pairwise distance matrix in `dist_file`,
+    treating missing distances as completely distant.'''
+    # read sample names as strings, so numeric names match the header
+    df = pd.read_csv(dist_file, index_col='sample', dtype={'sample': str})
+    df = df.loc[:, df.index]
+    df.fillna(1.0, inplace=True)
+    values = df.to_numpy(dtype=np.float64)
+    values = (values + values.T) / 2
+    np.fill_diagonal(values, 0.0)
+    return pd.DataFrame(values, index=df.index, columns=df.index)
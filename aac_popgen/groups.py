@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# aac_popgen/groups.py
+''' Reading groups CSVs, which supply "sample" and "group" columns, and finding
+which groups carry every allele of a genotype table.'''
+
+import csv
+from pathlib import Path
+from typing import Dict, List, Set, Union
+
+import pandas as pd
+
+
+def read_groups(groups_file: Union[str, Path]) -> Dict[str, List[str]]:
+    ''' Returns a mapping of group name to the samples in that group,
+    in the order they appear in `groups_file`.'''
+    groups = {}
+    with open(groups_file, 'r') as fin:
+        reader = csv.DictReader(fin)
+        for row in reader:
+            if row['group'] not in groups:
+                groups[row['group']] = []
+            groups[row['group']].append(row['sample'])
+    return groups
+
+def read_sample_groups(groups_file: Union[str, Path]) -> Dict[str, str]:
+    ''' Returns a mapping of sample to group from `groups_file`.'''
+    groups = {}
+    with open(groups_file, 'r') as fin:
+        reader = csv.DictReader(fin)
+        for row in reader:
+            groups[row['sample']] = row['group']
+    return groups
+
+def csv_to_pca_groups_df(groups_file: Union[str, Path]) -> pd.DataFrame:
+    ''' Returns the groups in `groups_file` as a DataFrame indexed by sample,
+    with a single "group" column, ready to merge with PCA results.'''
+    groups = read_sample_groups(groups_file)
+    groups_df = pd.DataFrame.from_dict(groups, orient='index', columns=['group'])
+    groups_df.index.name = 'sample'
+    return groups_df
+
+def allele_membership(df: pd.DataFrame, groups: Dict[str, List[str]]) -> Dict[str, Set[str]]:
+    ''' Returns, for every group with samples in the genotype table `df`, the
+    alleles (as POS_REF>ALT) carried by at least one of its samples. Groups
+    without any sample in the table are left out.'''
+    loci = zip(df['reference_pos'], df['reference_allele'], df['sample_allele'])
+    keys = pd.Series([f'{pos}_{ref}>{mut}' for pos, ref, mut in loci], index=df.index)
+    membership = {}
+    for group, samples in groups.items():
+        columns = df.columns.intersection(samples)
+        if len(columns) == 0:
+            continue
+        carried = df[columns].isin(['11', '10']).any(axis=1)
+        membership[group] = set(keys[carried])
+    return membership
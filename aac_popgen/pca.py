@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# aac_popgen/pca.py
+''' PCA and k-means clustering of a pairwise distance matrix.'''
+
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def standardize(df: pd.DataFrame) -> np.ndarray:
+    ''' Returns the columns of `df` scaled to zero mean and unit variance.'''
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    return scaler.fit_transform(df)
+
+def fit_pca(data: np.ndarray, n_components: int=None) -> Tuple['sklearn.decomposition.PCA', np.ndarray]:
+    ''' Fits a PCA with `n_components` components (all of them if not given)
+    to `data`, and returns it and the transformed data.'''
+    from sklearn.decomposition import PCA
+
+    pca = PCA(n_components=n_components)
+    scores = pca.fit_transform(data)
+    return pca, scores
+
+def components_for_variance(pca: 'sklearn.decomposition.PCA', threshold: float=0.8) -> int:
+    ''' Returns the number of components of the fitted `pca` needed to explain
+    at least `threshold` of the variance.'''
+    cum_variance = pca.explained_variance_ratio_.cumsum()
+    for i, cv in enumerate(cum_variance):
+        if cv >= threshold:
+            return i+1
+    return len(cum_variance)
+
+def fit_kmeans(scores: np.ndarray, k: int, random_seed: int=42) -> 'sklearn.cluster.KMeans':
+    ''' Returns a k-means clustering of `scores` into `k` clusters.'''
+    from sklearn.cluster import KMeans
+
+    kmeans = KMeans(n_clusters=k, random_state=random_seed)
+    kmeans.fit_transform(scores)
+    return kmeans
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+# aac_popgen/popstats.py
+''' Per-locus, per-group population statistics and pairwise Hudson Fst,
+accumulated over a genotype table read in chunks.'''
+
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from aac_popgen.clc import META_COLUMNS
+from aac_popgen.genotypes import MISSING, encode_genotypes, sample_columns
+from aac_popgen.profiling import Profiler
+
+
+def group_counts(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    ''' Returns the per-locus number of called samples, alternate alleles and
+    heterozygous samples for a (loci x samples) array of genotype codes.'''
+    called = codes != MISSING
+    n = called.sum(axis=1)
+    alt = np.where(called, codes, 0).sum(axis=1)
+    het = (codes == 1).sum(axis=1)
+    return n, alt, het
+
+def hudson_fst_terms(
+        n1: np.ndarray,
+        p1: np.ndarray,
+        n2: np.ndarray,
+        p2: np.ndarray
+        ) -> Tuple[np.ndarray, np.ndarray]:
+    ''' Returns the per-locus numerator and denominator of Hudson's Fst for two
+    groups, given the number of called samples and alternate allele frequency
+    of each. Loci not called in both groups contribute nothing.'''
+    valid = (n1 > 0) & (n2 > 0)
+    # sample sizes in alleles, not individuals
+    a1 = np.where(valid, 2 * n1, 2)
+    a2 = np.where(valid, 2 * n2, 2)
+    p1 = np.where(valid, p1, 0.0)
+    p2 = np.where(valid, p2, 0.0)
+    num = (p1 - p2) ** 2 - p1 * (1 - p1) / (a1 - 1) - p2 * (1 - p2) / (a2 - 1)
+    den = p1 * (1 - p2) + p2 * (1 - p1)
+    num = np.where(valid, num, 0.0)
+    den = np.where(valid, den, 0.0)
+    return num, den
+
+def population_stats(
+        file_in: Union[str, Path],
+        groups: Dict[str, List[str]],
+        file_out: Union[str, Path, None]=None,
+        chunksize: int=100000,
+        profiler: Profiler=None
+        ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    ''' Streams the genotype table `file_in` in chunks of `chunksize` loci,
+    writing per-locus statistics for every group to `file_out` (if given) as
+    each chunk completes.
+
+    Returns a per-group summary and a pairwise Fst matrix, both accumulated
+    over every locus in the table. The read, encode, compute and write phases
+    of every chunk are measured by `profiler`, if given.'''
+    if profiler == None:
+        profiler = Profiler()
+    reader = pd.read_csv(file_in, dtype=str, chunksize=chunksize)
+    sample_idx = {}
+    names = []
+    totals = {}
+    fst_num = {}
+    fst_den = {}
+    write_header = True
+    while True:
+        with profiler.phase('read') as phase:
+            try:
+                chunk = next(reader)
+            except StopIteration:
+                break
+            phase.count(len(chunk))
+        # the header is only written with the first chunk
+        if write_header == True:
+            meta_columns = chunk.columns[:len(META_COLUMNS)]
+            samples = sample_columns(chunk)
+            # only keep groups with at least one sample present in the table
+            for group, members in groups.items():
+                idx = [samples.get_loc(s) for s in members if s in samples]
+                if len(idx) > 0:
+                    names.append(group)
+                    sample_idx[group] = np.array(idx)
+            if len(names) == 0:
+                raise ValueError('No samples in the groups file are present in the genotype table')
+            totals = {g: {'loci': 0, 'called': 0, 'het': 0, 'he': 0.0, 'he_loci': 0} for g in names}
+            pairs = list(combinations(names, 2))
+            fst_num = {pair: 0.0 for pair in pairs}
+            fst_den = {pair: 0.0 for pair in pairs}
+
+        with profiler.phase('encode') as phase:
+            codes = encode_genotypes(chunk[samples])
+            phase.count(len(codes))
+        with profiler.phase('compute') as phase:
+            phase.count(len(codes))
+            out = chunk[meta_columns].copy()
+            freqs = {}
+            for group in names:
+                n, alt, het = group_counts(codes[:, sample_idx[group]])
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    p = alt / (2 * n)
+                    ho = het / n
+                he = 2 * p * (1 - p)
+                freqs[group] = (n, p)
+
+                size = len(sample_idx[group])
+                out[f'{group}_n'] = n
+                out[f'{group}_missing'] = 1 - n / size
+                out[f'{group}_af'] = p
+                out[f'{group}_ho'] = ho
+                out[f'{group}_he'] = he
+
+                total = totals[group]
+                total['loci'] += len(n)
+                total['called'] += int(n.sum())
+                total['het'] += int(het.sum())
+                total['he'] += float(np.nansum(he))
+                total['he_loci'] += int((n > 0).sum())
+
+            for (g1, g2) in fst_num:
+                num, den = hudson_fst_terms(*freqs[g1], *freqs[g2])
+                fst_num[(g1, g2)] += float(num.sum())
+                fst_den[(g1, g2)] += float(den.sum())
+
+        with profiler.phase('write') as phase:
+            if file_out != None:
+                out.to_csv(file_out, mode='w' if write_header else 'a', header=write_header, index=False)
+                phase.count(len(out))
+        write_header = False
+
+    summary = {}
+    for group in names:
+        total = totals[group]
+        size = len(sample_idx[group])
+        cells = total['loci'] * size
+        summary[group] = {
+            'samples': size,
+            'loci': total['loci'],
+            'missing': 1 - total['called'] / cells if cells > 0 else float('NaN'),
+            'ho': total['het'] / total['called'] if total['called'] > 0 else float('NaN'),
+            'he': total['he'] / total['he_loci'] if total['he_loci'] > 0 else float('NaN'),
+        }
+    summary_df = pd.DataFrame.from_dict(summary, orient='index')
+    summary_df.index.name = 'group'
+
+    fst = pd.DataFrame(0.0, index=names, columns=names)
+    for (g1, g2) in fst_num:
+        den = fst_den[(g1, g2)]
+        value = fst_num[(g1, g2)] / den if den > 0 else float('NaN')
+        fst.loc[g1, g2] = value
+        fst.loc[g2, g1] = value
+    fst.index.name = 'group'
+    return summary_df, fst
+
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+# aac_popgen/profiling.py
+''' Shared --profile support for the scripts of this project.
+
+A script splits its work into named phases (read, encode, compute, write,
+render, ...). With --profile, the wall time, CPU time, peak resident memory and
+number of rows or pairs processed per second of every phase are written to a
+JSON file next to the script's output, and with --profile_stats the cProfile
+statistics of one phase are dumped for inspection with pstats. Without
+--profile, phases cost next to nothing.
+
+The peak memory of a phase is measured by resetting the kernel's peak memory
+counter when the phase starts, which is only possible on Linux. Elsewhere a
+phase only reports a peak if it raised the peak of the process; otherwise its
+peak is null.
+
+    profiler = Profiler.from_args(args, default=output)
+    with profiler.phase('read') as phase:
+        df = pd.read_csv(...)
+        phase.count(len(df))
+    ...
+    profiler.write()
+'''
+
+import argparse
+import cProfile
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Union
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows, where peak memory is not reported
+    resource = None
+
+
+def max_rss() -> Union[int, None]:
+    ''' Returns the peak resident memory of this process so far, in bytes.'''
+    if resource == None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux, but bytes on macOS
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+def reset_max_rss() -> bool:
+    ''' Resets the peak resident memory of this process to its current resident
+    memory. Returns whether this is supported.'''
+    try:
+        with open('/proc/self/clear_refs', 'w') as fout:
+            fout.write('5')
+    except OSError:
+        return False
+    return True
+
+def _larger(a: Union[int, None], b: Union[int, None]) -> Union[int, None]:
+    if a == None:
+        return b
+    if b == None:
+        return a
+    return max(a, b)
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    ''' Adds the --profile and --profile_stats options to `parser`.'''
+    parser.add_argument(
+        '--profile',
+        dest='profile',
+        nargs='?',
+        const='',
+        metavar='PATH/TO/PROFILE.json',
+        help='Record the time, CPU and memory use of every phase to this JSON file, or next to the output if no file is given'
+    )
+    parser.add_argument(
+        '--profile_stats',
+        dest='profile_stats',
+        metavar='PHASE',
+        help='Also dump cProfile statistics for this phase, next to the --profile file'
+    )
+
+
+class _NullPhase:
+    ''' Stands in for Phase when profiling is off.'''
+
+    def __enter__(self) -> '_NullPhase':
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def count(self, items: int):
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class Phase:
+    ''' Measures one pass through a named phase, adding it to the totals of
+    every earlier pass through the same phase.'''
+
+    def __init__(self, profiler: 'Profiler', name: str):
+        self.profiler = profiler
+        self.name = name
+        self.items = 0
+
+    def __enter__(self) -> 'Phase':
+        self.stats = None
+        if self.name == self.profiler.stats_phase:
+            self.stats = self.profiler.stats.setdefault(self.name, cProfile.Profile())
+            self.stats.enable()
+        # resetting the peak loses the peak of the process so far, so keep it
+        self.profiler.max_rss = _larger(self.profiler.max_rss, max_rss())
+        self.reset = reset_max_rss()
+        self.start_rss = max_rss()
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.start_wall
+        cpu = time.process_time() - self.start_cpu
+        if self.stats != None:
+            self.stats.disable()
+        peak = max_rss()
+        self.profiler.max_rss = _larger(self.profiler.max_rss, peak)
+        if not self.reset and (peak == None or peak <= self.start_rss):
+            # the peak of this phase is hidden by an earlier, higher one
+            peak = None
+        record = self.profiler.phases.setdefault(self.name, {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'items': 0, 'max_rss_bytes': None})
+        record['calls'] += 1
+        record['wall_s'] += wall
+        record['cpu_s'] += cpu
+        record['items'] += self.items
+        record['max_rss_bytes'] = _larger(record['max_rss_bytes'], peak)
+        return False
+
+    def count(self, items: int):
+        ''' Records that `items` rows, loci or pairs were processed.'''
+        self.items += items
+
+
+class Profiler:
+    ''' Collects the measurements of every phase of a script. Does nothing if
+    `path` is None.'''
+
+    def __init__(self, path: Union[str, Path, None]=None, stats_phase: str=None):
+        self.path = None if path == None else Path(path)
+        self.stats_phase = stats_phase
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.stats: Dict[str, cProfile.Profile] = {}
+        self.max_rss = max_rss()
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace, default: Union[str, Path]) -> 'Profiler':
+        ''' Returns the profiler requested by the options added with
+        add_profile_arguments. `default` is the output the profile should be
+        written next to if no file was given.'''
+        if args.profile == None and args.profile_stats == None:
+            return cls()
+        if args.profile == None or args.profile == '':
+            path = Path(f'{default}.profile.json')
+        else:
+            path = Path(args.profile)
+        return cls(path, stats_phase=args.profile_stats)
+
+    @property
+    def enabled(self) -> bool:
+        return self.path != None
+
+    def phase(self, name: str) -> Union[Phase, _NullPhase]:
+        ''' Returns a context manager measuring the phase `name`.'''
+        if self.path == None:
+            return _NULL_PHASE
+        return Phase(self, name)
+
+    def write(self):
+        ''' Writes the measurements of every phase to the profile file, and the
+        cProfile statistics, if any, next to it.'''
+        if self.path == None:
+            return
+        phases = {}
+        for name, record in self.phases.items():
+            record = dict(record)
+            if record['items'] > 0 and record['wall_s'] > 0:
+                record['items_per_s'] = record['items'] / record['wall_s']
+            phases[name] = record
+        report = {
+            'argv': sys.argv,
+            'wall_s': time.perf_counter() - self.start_wall,
+            'cpu_s': time.process_time() - self.start_cpu,
+            'max_rss_bytes': _larger(self.max_rss, max_rss()),
+            'phases': phases,
+        }
+        with open(self.path, 'w') as fout:
+            json.dump(report, fout, indent=2)
+        for name, stats in self.stats.items():
+            stats.dump_stats(self.path.with_suffix(f'.{name}.pstats'))
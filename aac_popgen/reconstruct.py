@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# aac_popgen/reconstruct.py
+''' Reconstructing homozygous reference genotypes, which CLC exports leave
+empty, from the read depth of every sample at every locus.'''
+
+from pathlib import Path
+from typing import Dict, List, Union
+
+import pandas as pd
+
+from aac_popgen.clc import META_COLUMNS
+from aac_popgen.profiling import Profiler
+
+
+def read_depth(depth_tsv: Union[str, Path]) -> pd.DataFrame:
+    ''' Returns the `samtools depth -a -H` output in `depth_tsv`, with every
+    value as a string.'''
+    return pd.read_csv(depth_tsv, dtype=str, delimiter='\t')
+
+def map_samples_to_bams(sample_names: List[str], depth_names: List[str]) -> Dict[str, str]:
+    ''' Maps every sample to the first depth column naming its BAM file.'''
+    sample_bam_map = {}
+    for sample_name in sample_names:
+        for depth_name in depth_names:
+            if f'{sample_name}.bam' in depth_name:
+                sample_bam_map[sample_name] = depth_name
+                break
+    return sample_bam_map
+
+def reconstruct_ref_homs(
+        aac_df: pd.DataFrame,
+        depth_df: pd.DataFrame,
+        min_depth: int=10,
+        profiler: Profiler=None
+        ) -> pd.DataFrame:
+    ''' Fills the empty genotypes of the genotype table `aac_df` with 00 where
+    the sample has at least `min_depth` reads at the locus, in place. Other
+    empty genotypes are left as empty strings.'''
+    if profiler == None:
+        profiler = Profiler()
+    # read_genotypes leaves empty genotypes as NaN
+    aac_df.fillna('', inplace=True)
+    sample_names = aac_df.columns[len(META_COLUMNS):]
+    depth_names = depth_df.columns[2:]
+    sample_bam_map = map_samples_to_bams(sample_names, depth_names)
+
+    with profiler.phase('compute') as phase:
+        for i, row in aac_df.iterrows():
+            phase.count(1)
+            name = row['reference_name']
+
+            # the ref names in the AAC summary can be manipulated here to match the
+            # names in the depth tsv if they don't match
+            stripped_name = name
+            # stripped_name = stripped_name.replace(' ', '').rstrip('mapping')
+
+            pos = str(row['reference_pos'])
+            name_mask = (aac_df['reference_name'] == name)
+            pos_mask = (aac_df['reference_pos'] == pos)
+            aac_mask = name_mask & pos_mask
+            df = depth_df[(depth_df['#CHROM'] == stripped_name) & (depth_df['POS'] == pos)]
+            for sample_name, depth_name in sample_bam_map.items():
+                samtools_depth = int(df[depth_name].iloc[0])
+                genotype = str(aac_df[aac_mask][sample_name].iloc[0])
+                if (genotype == '') and (samtools_depth >= min_depth):
+                    aac_df.loc[i, sample_name] = '00'
+    return aac_df
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+# aac_popgen/tree.py
+''' UPGMA and neighbour-joining trees of a pairwise distance matrix, and
+writing them in Newick format.'''
+
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+
+# maps an internal node to its (child, branch length) pairs
+Tree = Dict[int, List[Tuple[int, float]]]
+
+# sorted entries of each row examined at a time while searching for a join
+SEARCH_WINDOW = 8
+# number of matrix entries sorted at a time when neighbour joining starts
+SORT_BLOCK = 1 << 20
+
+
+def upgma(dist: np.ndarray) -> Tuple[Tree, int]:
+    ''' Returns the UPGMA tree of the square distance matrix `dist` and its
+    root. Leaves are numbered by their row in `dist`.'''
+    n = len(dist)
+    tree = {}
+    if n < 2:
+        return tree, 0
+    from scipy.cluster.hierarchy import linkage
+    from scipy.spatial.distance import squareform
+
+    # scipy's average linkage uses the nearest-neighbour chain algorithm
+    z = linkage(squareform(dist, checks=False), method='average')
+    heights = np.zeros(2 * n - 1)
+    for k, (i, j, d, _) in enumerate(z):
+        node = n + k
+        heights[node] = d / 2
+        tree[node] = [(int(c), heights[node] - heights[int(c)]) for c in (i, j)]
+    return tree, 2 * n - 2
+
+def neighbor_joining(dist: np.ndarray) -> Tuple[Tree, int]:
+    ''' Returns the neighbour-joining tree of the square distance matrix `dist`
+    and the node it is rooted at for output. Leaves are numbered by their row in
+    `dist`. Negative branch lengths are set to zero.
+
+    The search for each join follows RapidNJ (Simonsen et al. 2008): every row
+    keeps its distances sorted, which bounds the Q values left in the row, so
+    only a short prefix of most rows is ever examined.'''
+    n = len(dist)
+    tree = {}
+    if n < 2:
+        return tree, 0
+    if n == 2:
+        tree[2] = [(0, dist[0, 1] / 2), (1, dist[0, 1] / 2)]
+        return tree, 2
+
+    d = np.array(dist, dtype=np.float64)
+    np.fill_diagonal(d, 0.0)
+    r = d.sum(axis=1)
+    alive = np.ones(n, dtype=bool)
+    node_at = np.arange(n)
+    # a row only holds the nodes that existed when it was sorted, pairs with
+    # younger nodes are found in the younger node's row instead
+    born = np.zeros(n, dtype=np.int64)
+    # sort the rows a block at a time, so the temporaries of sorting stay
+    # small next to the n x n matrices themselves
+    cols = np.zeros((n, n), dtype=np.int32)
+    sorted_d = np.full((n, n), np.inf)
+    block = max(1, SORT_BLOCK // n)
+    for b in range(0, n, block):
+        rows = np.arange(b, min(b + block, n))
+        order = np.argsort(d[rows], axis=1, kind='stable')
+        # drop each row's own (zero) distance from its sorted entries
+        order = order[order != rows[:, None]].reshape(len(rows), n - 1)
+        cols[rows, :n - 1] = order
+        sorted_d[rows, :n - 1] = np.take_along_axis(d[rows], order, axis=1)
+    del order
+    length = np.full(n, n - 1)
+    offset = np.zeros(n, dtype=np.int64)
+    next_node = n
+    m = n
+    while m > 3:
+        live = np.flatnonzero(alive)
+        r_max = r[live].max()
+
+        # skip entries for nodes that have been joined since the row was sorted
+        rows = live
+        while rows.size:
+            c = cols[rows, np.minimum(offset[rows], n - 1)]
+            stale = (offset[rows] < length[rows]) & ~(alive[c] & (born[c] <= born[rows]))
+            rows = rows[stale]
+            offset[rows] += 1
+
+        # find the pair minimizing Q(i, j) = (m - 2) d(i, j) - r(i) - r(j),
+        # scanning each row in windows until the row's remaining entries
+        # cannot beat the best pair found so far
+        best = np.inf
+        best_i = best_j = -1
+        rows = live
+        start = offset[live]
+        # every row's nearest entry gives a good first guess cheaply, only the
+        # rows that may still beat it are scanned further
+        width = 1
+        while rows.size:
+            window = start[:, None] + np.arange(width)
+            idx = np.minimum(window, n - 1)
+            window_d = sorted_d[rows[:, None], idx]
+            window_c = cols[rows[:, None], idx]
+            valid = (
+                (window < length[rows, None])
+                & alive[window_c]
+                & (born[window_c] <= born[rows, None])
+            )
+            q = np.where(valid, (m - 2) * window_d - r[rows, None] - r[window_c], np.inf)
+            k = np.unravel_index(q.argmin(), q.shape)
+            if q[k] < best:
+                best = q[k]
+                best_i, best_j = rows[k[0]], window_c[k]
+            bound = (m - 2) * window_d[:, -1] - r[rows] - r_max
+            more = (bound < best) & (start + width < length[rows])
+            rows = rows[more]
+            start = start[more] + width
+            width = SEARCH_WINDOW
+        i, j = min(best_i, best_j), max(best_i, best_j)
+
+        dij = d[i, j]
+        li = dij / 2 + (r[i] - r[j]) / (2 * (m - 2))
+        lj = dij - li
+        tree[next_node] = [(node_at[i], max(li, 0.0)), (node_at[j], max(lj, 0.0))]
+
+        # the joined node takes the place of i, and j is removed
+        alive[j] = False
+        others = alive.copy()
+        others[i] = False
+        new = np.zeros(n)
+        new[others] = (d[i, others] + d[j, others] - dij) / 2
+        r[others] += new[others] - d[i, others] - d[j, others]
+        r[i] = new[others].sum()
+        d[i, :] = new
+        d[:, i] = new
+        node_at[i] = next_node
+        next_node += 1
+        m -= 1
+
+        others = np.flatnonzero(others)
+        order = others[np.argsort(new[others], kind='stable')]
+        cols[i, :len(order)] = order
+        sorted_d[i, :len(order)] = new[order]
+        sorted_d[i, len(order):] = np.inf
+        length[i] = len(order)
+        offset[i] = 0
+        born[i] = next_node
+
+    # join the last three nodes at the root
+    a, b, c = np.flatnonzero(alive)
+    la = (d[a, b] + d[a, c] - d[b, c]) / 2
+    lb = d[a, b] - la
+    lc = d[a, c] - la
+    tree[next_node] = [
+        (node_at[a], max(la, 0.0)),
+        (node_at[b], max(lb, 0.0)),
+        (node_at[c], max(lc, 0.0))
+    ]
+    return tree, next_node
+
+def newick_label(name: str) -> str:
+    ''' Returns `name` quoted if it contains characters reserved by Newick.'''
+    if any(ch in name for ch in "()[]':;, \t"):
+        return "'" + name.replace("'", "''") + "'"
+    return name
+
+def nhx_value(value: str) -> str:
+    ''' Returns `value` with the characters reserved by Newick and NHX
+    replaced by underscores, as NHX values cannot be quoted.'''
+    return ''.join('_' if ch in "()[]':;,=& \t" else ch for ch in value)
+
+def to_newick(tree: Tree, root: int, labels: List[str], groups: Dict[str, str]=None) -> str:
+    ''' Returns the Newick representation of `tree`. Leaves are named from
+    `labels`, and annotated with their group from `groups` if given.'''
+    if groups == None:
+        groups = {}
+
+    def leaf(node: int, length: Union[float, None]) -> str:
+        name = labels[node]
+        text = newick_label(name)
+        if length != None:
+            text += f':{length:.6g}'
+        if name in groups:
+            text += f'[&&NHX:group={nhx_value(groups[name])}]'
+        return text
+
+    if root not in tree:
+        return leaf(root, None) + ';'
+    # iterative post-order traversal, as trees can be deeper than the recursion limit
+    done = {}
+    stack = [(root, None, False)]
+    while stack:
+        node, length, expanded = stack.pop()
+        if node not in tree:
+            done[node] = leaf(node, length)
+        elif not expanded:
+            stack.append((node, length, True))
+            for child, child_length in tree[node]:
+                stack.append((child, child_length, False))
+        else:
+            text = '(' + ','.join(done.pop(child) for child, _ in tree[node]) + ')'
+            if length != None:
+                text += f':{length:.6g}'
+            done[node] = text
+    return done[root] + ';'
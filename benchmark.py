@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+# benchmark.py
+''' Times every script of the workflow on synthetic data sets (see
+synthesize.py) of several sizes, and writes a JSON report of the wall time,
+CPU time and peak memory of every stage at every scale, so runs on different
+commits can be compared.
+
+Each stage runs in its own process, so its peak memory is measured in
+isolation. Measuring peak memory relies on os.wait4, which is only available on
+Unix.
+'''
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from synthesize import synthesize
+
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+# name, script, and the arguments to run it with given the data set folder and
+# a scratch folder. reconstruct uses the output of summarize, and pca, heatmap
+# and tree use the output of jaccard.
+STAGES: List[Tuple[str, str, Callable[[Path, Path], List[str]]]] = [
+    ('summarize', 'summarize_aac.py', lambda d, w: ['-i', str(d / 'aac_csv'), '-o', str(w / 'aac.csv'), '--keep_silent']),
+    ('reconstruct', 'reconstruct_ref_homs.py', lambda d, w: ['-a', str(w / 'aac.csv'), '-b', str(d / 'depth.tsv'), '-o', str(w / 'reconstructed.csv')]),
+    ('filter', 'filter.py', lambda d, w: ['-f', str(d / 'gt.csv'), '-o', str(w / 'filtered.csv'), '-l', '0.5', '-s', '0.5']),
+    ('jaccard', 'jaccard.py', lambda d, w: ['-f', str(d / 'gt.csv'), '-o', str(w / 'jaccard.dist'), '-q']),
+    ('popstats', 'popstats.py', lambda d, w: ['-f', str(d / 'gt.csv'), '-g', str(d / 'groups.csv'), '-o', str(w / 'popstats.csv'), '--summary', str(w / 'popstats_summary.csv'), '--fst', str(w / 'fst.dist')]),
+    ('upset', 'upset.py', lambda d, w: ['-f', str(d / 'gt.csv'), '-g', str(d / 'groups.csv'), '-o', str(w / 'upset.png')]),
+    ('pca', 'pca.py', lambda d, w: ['-f', str(w / 'jaccard.dist'), '-o', str(w / 'pca'), '--plot_pca', '--groups', str(d / 'groups.csv')]),
+    ('heatmap', 'heatmap.py', lambda d, w: ['-f', str(w / 'jaccard.dist'), '-o', str(w / 'heatmap.png')]),
+    ('tree', 'tree.py', lambda d, w: ['-f', str(w / 'jaccard.dist'), '-o', str(w / 'trees')]),
+]
+
+
+def parse_scale(scale: str) -> Tuple[int, int]:
+    ''' Parses a scale given as SAMPLESxLOCI.'''
+    try:
+        samples, loci = scale.lower().split('x')
+        return int(samples), int(loci)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'Scale must look like SAMPLESxLOCI, got {scale}')
+
+def measure(command: List[str], timeout: float=None) -> Dict[str, object]:
+    ''' Runs `command` and returns its exit status, wall time, CPU time and
+    peak resident memory. The command is killed after `timeout` seconds.'''
+    start = time.monotonic()
+    proc = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    timer = None
+    if timeout != None:
+        timer = threading.Timer(timeout, proc.kill)
+        timer.start()
+    # read stderr before reaping the process, so a chatty stage cannot block on
+    # a full pipe
+    stderr = proc.stderr.read()
+    proc.stderr.close()
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.monotonic() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    timed_out = False
+    if timer != None:
+        timed_out = not timer.is_alive()
+        timer.cancel()
+    # ru_maxrss is in kilobytes on Linux, but bytes on macOS
+    max_rss = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+    if timed_out:
+        status = 'timeout'
+    elif proc.returncode != 0:
+        status = 'failed'
+    else:
+        status = 'ok'
+    result = {
+        'status': status,
+        'returncode': proc.returncode,
+        'wall_s': round(wall, 4),
+        'cpu_s': round(usage.ru_utime + usage.ru_stime, 4),
+        'max_rss_bytes': max_rss,
+    }
+    if status == 'failed':
+        result['stderr'] = stderr.decode(errors='replace')[-2000:]
+    return result
+
+def prepare_data(data: Path, params: Dict[str, object]):
+    ''' Generates the synthetic data set described by `params` in `data`,
+    unless it already holds one generated with the same parameters. The
+    parameters are recorded in a manifest next to the data set.'''
+    manifest = data / 'params.json'
+    if manifest.exists():
+        with open(manifest) as fin:
+            if json.load(fin) == params:
+                return
+    # start from an empty folder, so no file of an earlier data set remains
+    shutil.rmtree(data, ignore_errors=True)
+    print(f"Generating {params['samples']} samples x {params['loci']} loci", file=sys.stderr)
+    synthesize(
+        data,
+        params['samples'],
+        params['loci'],
+        missing=params['missing'],
+        het=params['het'],
+        compress=params['gzip'],
+        seed=params['seed']
+    )
+    # written last, so an interrupted generation is redone
+    with open(manifest, 'w') as fout:
+        json.dump(params, fout, indent=2)
+
+def git_commit() -> str:
+    ''' Returns the current commit of the repository, if it can be found.'''
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=SCRIPT_DIR, capture_output=True, text=True)
+    except OSError:
+        return ''
+    return result.stdout.strip()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-s', '--scales', dest='scales', type=parse_scale, nargs='+', default=[(10, 1000), (50, 2000), (200, 10000)], metavar='SAMPLESxLOCI', help='Sizes of the data sets to benchmark on')
+    parser.add_argument('--stages', dest='stages', nargs='+', choices=[s[0] for s in STAGES], default=[s[0] for s in STAGES], help='Stages to benchmark')
+    parser.add_argument('-m', '--missing', dest='missing', type=float, default=0.1, help='Probability a sample has no genotype at a locus')
+    parser.add_argument('--het', dest='het', type=float, default=0.2, help='Probability a called genotype is heterozygous')
+    parser.add_argument('-z', '--gzip', dest='compress', action='store_true', help='Gzip the CLC exports')
+    parser.add_argument('-r', '--repeat', dest='repeat', type=int, default=1, help='Number of times to run every stage')
+    parser.add_argument('--timeout', dest='timeout', type=float, default=600.0, help='Kill a stage after this many seconds and record it as timed out. 0 for no limit')
+    parser.add_argument('--seed', dest='seed', type=int, default=42)
+    parser.add_argument('--workdir', dest='workdir', type=Path, help='Folder to generate data sets and outputs in. A temporary folder is used and removed if not given')
+    parser.add_argument('-o', '--output', dest='output', type=Path, default=Path('benchmark.json'), help='Path to write the JSON report to')
+    args = parser.parse_args()
+
+    timeout = args.timeout if args.timeout > 0 else None
+
+    workdir = args.workdir
+    if workdir == None:
+        workdir = Path(tempfile.mkdtemp(prefix='aac_popgen_bench_'))
+
+    report = {
+        'commit': git_commit(),
+        'started': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'config': {
+            'missing': args.missing,
+            'het': args.het,
+            'gzip': args.compress,
+            'repeat': args.repeat,
+            'timeout': timeout,
+            'seed': args.seed,
+        },
+        'results': [],
+    }
+
+    try:
+        for samples, loci in args.scales:
+            data = workdir / f'{samples}x{loci}'
+            params = {
+                'samples': samples,
+                'loci': loci,
+                'missing': args.missing,
+                'het': args.het,
+                'gzip': args.compress,
+                'seed': args.seed,
+            }
+            prepare_data(data, params)
+            for run in range(args.repeat):
+                scratch = data / f'run{run}'
+                scratch.mkdir(exist_ok=True)
+                for name, script, arguments in STAGES:
+                    if name not in args.stages:
+                        continue
+                    command = [sys.executable, str(SCRIPT_DIR / script)] + arguments(data, scratch)
+                    result = measure(command, timeout=timeout)
+                    result = {'samples': samples, 'loci': loci, 'stage': name, 'run': run, **result}
+                    report['results'].append(result)
+                    print(f"{samples}x{loci}\t{name}\t{result['status']}\t{result['wall_s']:.2f}s\t{result['max_rss_bytes'] / 2**20:.1f}MiB", file=sys.stderr)
+    finally:
+        with open(args.output, 'w') as fout:
+            json.dump(report, fout, indent=2)
+        if args.workdir == None:
+            shutil.rmtree(workdir, ignore_errors=True)
@@ -1,9 +1,10 @@
 
 
 import argparse
-import math
 
-import pandas as pd
+from aac_popgen.filtering import filter_genotypes
+from aac_popgen.genotypes import read_genotypes
+from aac_popgen.profiling import Profiler, add_profile_arguments
 
 
 if __name__ == '__main__':
@@ -31,6 +32,7 @@ if __name__ == '__main__':
         dest='sample_thresh',
         help=sample_thresh_help
     )
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
     loci_thresh = args.loci_thresh
@@ -38,43 +40,24 @@ if __name__ == '__main__':
     fin = args.file_in
     fout = args.file_out
 
-    gt = pd.read_csv(fin, dtype=str)
+    profiler = Profiler.from_args(args, default=fout if fout != '' else fin)
 
-    pre_len = gt.shape
+    with profiler.phase('read') as phase:
+        gt = read_genotypes(fin)
+        phase.count(len(gt))
 
-    # remove changes stemming from Ns in the reference sequence
-    if args.drop_n == True:
-        gt = gt[gt['reference_allele'] != 'N']
-    num_n_loci = pre_len[0] - gt.shape[0]
-
-    # loci are dropped before samples, assuming that samples are more complete
-    # than loci.
-    # drop loci (rows) if they are in too few samples
-    num_thresh_cols = len(gt.columns[5:])
-    _loci_thresh = int(math.ceil(num_thresh_cols * loci_thresh))
-    gt = gt.dropna(axis='index', thresh=_loci_thresh, subset=gt.columns[5:])
-
-    # drop samples (columns) if they have too few loci
-    num_thresh_rows = len(gt.index)
-    _sample_thresh = int(math.ceil(num_thresh_rows * sample_thresh))
-    _gt = gt.dropna(axis='columns', thresh=_sample_thresh)
-
-    # the change column was likely dropped because we can't change the behavior
-    # of df.dropna, so insert it back in if it's missing
-    try:
-        _gt.insert(2, 'amino_acid_change', gt['amino_acid_change'])
-    except ValueError:
-        pass
-    finally:
-        gt = _gt
-
-    # remove loci that have no mutant samples
-    pre_empty = gt.shape[0]
-    gt = gt[~(gt[gt.columns[5:]].fillna('00') == '00').all(axis=1)]
-    num_no_mutant = pre_empty - gt.shape[0]
-
-    post_len = gt.shape
+    with profiler.phase('compute') as phase:
+        pre_len = gt.shape
+        phase.count(pre_len[0])
+        gt, stats = filter_genotypes(gt, loci_thresh, sample_thresh, drop_n=args.drop_n)
+        post_len = gt.shape
 
+    num_n_loci = stats['num_n_loci']
+    num_no_mutant = stats['num_no_mutant']
+    _loci_thresh = stats['loci_thresh']
+    num_thresh_cols = stats['num_thresh_cols']
+    _sample_thresh = stats['sample_thresh']
+    num_thresh_rows = stats['num_thresh_rows']
     num_dropped_loci = pre_len[0] - post_len[0]
     num_dropped_samples = pre_len[1] - post_len[1]
     pre_volume = pre_len[0] * pre_len[1]
@@ -100,5 +83,9 @@ if __name__ == '__main__':
     print(f'\t{pre_len[0]}x{pre_len[1]} -> {post_len[0]}x{post_len[1]}')
     print(f'\t{pre_volume} -> {post_volume}')
 
-    if fout != '':
-        gt.to_csv(fout, index=False)
+    with profiler.phase('write') as phase:
+        if fout != '':
+            gt.to_csv(fout, index=False)
+            phase.count(len(gt))
+
+    profiler.write()
@@ -2,10 +2,10 @@
 
 import argparse
 
-import matplotlib.pyplot as plot
 import numpy as np
 import pandas as pd
-import seaborn as sns
+
+from aac_popgen.profiling import Profiler, add_profile_arguments
 
 
 if __name__ == '__main__':
@@ -16,21 +16,34 @@ if __name__ == '__main__':
     parser.add_argument('-x', dest='fig_x', type=int, default=5)
     parser.add_argument('-y', dest='fig_y', type=int, default=5)
     parser.add_argument('--dpi', dest='fig_dpi', type=int, default=300)
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    df = pd.read_csv(args.dist_file, index_col='sample')
-    fig, ax = plot.subplots(figsize=(args.fig_x, args.fig_y), dpi=args.fig_dpi)
-    sns.heatmap(df, ax=ax, vmin=0.0, vmax=1.0, cmap='viridis', square=True, cbar_kws={"shrink": .8})
-
-    ax.set_xticks(np.arange(0.5, df.shape[0]))
-    ax.set_yticks(np.arange(0.5, df.shape[0]))
-    ax.set_xticklabels(df.columns, rotation=-45.0, ha='right')
-    ax.set_yticklabels(df.columns)
-    ax.xaxis.tick_top()
-    ax.set_title(f'{args.heatmap_title}', {'fontsize': 40})
-    ax.set_ylabel('')
-
-    if args.out_file != '':
-        plot.savefig(args.out_file, bbox_inches='tight')
-    else:
-        plot.show()
+    profiler = Profiler.from_args(args, default=args.out_file if args.out_file != '' else 'heatmap')
+
+    with profiler.phase('read') as phase:
+        df = pd.read_csv(args.dist_file, index_col='sample')
+        phase.count(len(df))
+
+    with profiler.phase('render') as phase:
+        phase.count(df.size)
+        import matplotlib.pyplot as plot
+        import seaborn as sns
+
+        fig, ax = plot.subplots(figsize=(args.fig_x, args.fig_y), dpi=args.fig_dpi)
+        sns.heatmap(df, ax=ax, vmin=0.0, vmax=1.0, cmap='viridis', square=True, cbar_kws={"shrink": .8})
+
+        ax.set_xticks(np.arange(0.5, df.shape[0]))
+        ax.set_yticks(np.arange(0.5, df.shape[0]))
+        ax.set_xticklabels(df.columns, rotation=-45.0, ha='right')
+        ax.set_yticklabels(df.columns)
+        ax.xaxis.tick_top()
+        ax.set_title(f'{args.heatmap_title}', {'fontsize': 40})
+        ax.set_ylabel('')
+
+        if args.out_file != '':
+            plot.savefig(args.out_file, bbox_inches='tight')
+        else:
+            plot.show()
+
+    profiler.write()
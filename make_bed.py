@@ -1,24 +1,35 @@
 import argparse
 import csv
 
+from aac_popgen.profiling import Profiler, add_profile_arguments
+
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('-f', type=str, dest='aac_summary_file')
     parser.add_argument('-o', type=str, dest='bed_out')
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
+    profiler = Profiler.from_args(args, default=args.bed_out)
+
     with open(args.aac_summary_file, 'r') as fin:
-        reader = csv.DictReader(fin)
-        bed_rows = [
-            [
-                str(row['reference_name']),
-                int(row['reference_pos'])-1,
-                int(row['reference_pos']),
-                row['amino_acid_change']
-            ] for row in reader
-        ]
-        with open(f'{args.bed_out}', 'w', newline='') as fout:
-            writer = csv.writer(fout, delimiter='\t')
-            for line in bed_rows:
-                writer.writerow(line)
+        with profiler.phase('read') as phase:
+            reader = csv.DictReader(fin)
+            bed_rows = [
+                [
+                    str(row['reference_name']),
+                    int(row['reference_pos'])-1,
+                    int(row['reference_pos']),
+                    row['amino_acid_change']
+                ] for row in reader
+            ]
+            phase.count(len(bed_rows))
+        with profiler.phase('write') as phase:
+            with open(f'{args.bed_out}', 'w', newline='') as fout:
+                writer = csv.writer(fout, delimiter='\t')
+                for line in bed_rows:
+                    writer.writerow(line)
+            phase.count(len(bed_rows))
+
+    profiler.write()
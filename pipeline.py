@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+# pipeline.py
+''' Runs the whole workflow, from a folder of CLC amino acid change CSVs to the
+distance, statistics and plot outputs, as a graph of stages:
+
+    summarize -> [reconstruct] -> filter -> jaccard -> pca, heatmap, tree
+                                         -> upset, popstats (with --groups)
+
+Every stage is identified by a hash of its script, its parameters and the
+contents of its inputs, and its outputs are stored in a cache under that hash.
+A stage is only rerun if that hash has not been seen before, so changing, for
+example, the filter thresholds reuses the summarized table and only reruns
+filtering and what comes after it. Stages that do not depend on each other are
+run concurrently.
+'''
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple, Union
+
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+LIBRARY_DIR = SCRIPT_DIR / 'aac_popgen'
+
+
+class Stage:
+    ''' A step of the pipeline that runs `script` with the arguments returned
+    by `arguments`, given the paths of its inputs and its output folder.
+
+    `inputs` maps a name to either a path or a (stage, output) pair naming an
+    output of an earlier stage. `outputs` are the files or folders the stage
+    creates in its output folder.'''
+
+    def __init__(
+            self,
+            name: str,
+            script: str,
+            inputs: Dict[str, Union[Path, Tuple[str, str]]],
+            outputs: List[str],
+            params: Dict[str, object],
+            arguments: Callable[[Dict[str, Path], Path], List[str]]
+            ):
+        self.name = name
+        self.script = script
+        self.inputs = inputs
+        self.outputs = outputs
+        self.params = params
+        self.arguments = arguments
+
+    @property
+    def requires(self) -> List[str]:
+        return [i[0] for i in self.inputs.values() if isinstance(i, tuple)]
+
+
+def hash_path(path: Path, digest: 'hashlib._Hash'=None) -> str:
+    ''' Returns a hash of the contents of the file or folder at `path`.'''
+    if digest == None:
+        digest = hashlib.sha256()
+    if path.is_dir():
+        for child in sorted(path.iterdir()):
+            digest.update(child.name.encode() + b'\0')
+            hash_path(child, digest)
+    else:
+        with open(path, 'rb') as fin:
+            for block in iter(lambda: fin.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+def library_hash() -> str:
+    ''' Returns a hash of the sources of the aac_popgen package, which every
+    script imports from.'''
+    digest = hashlib.sha256()
+    for source in sorted(LIBRARY_DIR.glob('*.py')):
+        digest.update(source.name.encode() + b'\0')
+        hash_path(source, digest)
+    return digest.hexdigest()
+
+def stage_key(stage: Stage, inputs: Dict[str, Path]) -> str:
+    ''' Returns the hash identifying a run of `stage` on `inputs`.'''
+    digest = hashlib.sha256()
+    digest.update(hash_path(SCRIPT_DIR / stage.script).encode())
+    digest.update(library_hash().encode())
+    digest.update(json.dumps(stage.params, sort_keys=True, default=str).encode())
+    for name in sorted(inputs):
+        digest.update(name.encode() + b'\0')
+        digest.update(hash_path(inputs[name]).encode())
+    return digest.hexdigest()
+
+def run_stage(stage: Stage, inputs: Dict[str, Path], cache: Path) -> Tuple[Path, bool, float]:
+    ''' Runs `stage` unless its outputs are already in `cache`.
+
+    Returns the folder holding the stage's outputs, whether it was taken from
+    the cache, and how long the stage took to run.'''
+    key = stage_key(stage, inputs)
+    done = cache / stage.name / key
+    if done.exists():
+        return done, True, 0.0
+
+    # work in a private folder and move it into place once complete, so an
+    # interrupted or failed stage never leaves a partial entry in the cache
+    work = cache / stage.name / f'{key}.tmp-{os.getpid()}'
+    if work.exists():
+        shutil.rmtree(work)
+    work.mkdir(parents=True)
+    command = [sys.executable, str(SCRIPT_DIR / stage.script)]
+    command.extend(stage.arguments(inputs, work))
+    start = time.monotonic()
+    with open(work / 'log.txt', 'w') as log:
+        result = subprocess.run(command, stdout=log, stderr=subprocess.STDOUT)
+    elapsed = time.monotonic() - start
+    if result.returncode != 0:
+        raise RuntimeError(f'Stage {stage.name} failed, see {work / "log.txt"}')
+    for output in stage.outputs:
+        if not (work / output).exists():
+            raise RuntimeError(f'Stage {stage.name} did not create {output}, see {work / "log.txt"}')
+    try:
+        work.rename(done)
+    except OSError:
+        # another run finished the same stage first
+        shutil.rmtree(work)
+    return done, False, elapsed
+
+def run_pipeline(stages: List[Stage], out_folder: Path, cache: Path, jobs: int=1) -> Dict[str, Path]:
+    ''' Runs `stages` in dependency order, up to `jobs` at a time, and copies
+    every stage's outputs into `out_folder`.
+
+    Returns the cache folder holding the outputs of each stage.'''
+    by_name = {stage.name: stage for stage in stages}
+    results = {}
+    pending = list(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        while pending or running:
+            for stage in [s for s in pending if all(r in results for r in s.requires)]:
+                inputs = {}
+                for name, source in stage.inputs.items():
+                    if isinstance(source, tuple):
+                        inputs[name] = results[source[0]] / source[1]
+                    else:
+                        inputs[name] = Path(source)
+                pending.remove(stage)
+                running[executor.submit(run_stage, stage, inputs, cache)] = stage
+            if not running:
+                missing = {r for s in pending for r in s.requires if r not in by_name}
+                raise ValueError(f'Stages require unknown stages: {", ".join(sorted(missing))}')
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage = running.pop(future)
+                folder, cached, elapsed = future.result()
+                results[stage.name] = folder
+                status = 'cached' if cached else f'ran in {elapsed:.1f}s'
+                print(f'{stage.name}: {status}')
+
+    out_folder.mkdir(parents=True, exist_ok=True)
+    for stage in stages:
+        for output in stage.outputs:
+            source = results[stage.name] / output
+            target = out_folder / output
+            if target.is_dir():
+                shutil.rmtree(target)
+            if source.is_dir():
+                shutil.copytree(source, target)
+            else:
+                shutil.copy2(source, target)
+    return results
+
+def workflow(args: argparse.Namespace) -> List[Stage]:
+    ''' Returns the stages of the workflow described by the command line `args`.'''
+    stages = []
+
+    summarize_args = ['-c', str(args.coverage), '-n', args.default_name]
+    if args.keep_silent == True:
+        summarize_args.append('--keep_silent')
+    stages.append(Stage(
+        'summarize', 'summarize_aac.py',
+        inputs={'folder': args.input},
+        outputs=['aac.csv'],
+        params={'args': summarize_args},
+        arguments=lambda i, o: ['-i', str(i['folder']), '-o', str(o / 'aac.csv')] + summarize_args
+    ))
+    genotypes = ('summarize', 'aac.csv')
+
+    if args.depth != None:
+        stages.append(Stage(
+            'reconstruct', 'reconstruct_ref_homs.py',
+            inputs={'aac': genotypes, 'depth': args.depth},
+            outputs=['gt.csv'],
+            params={'min_depth': args.min_depth},
+            arguments=lambda i, o: ['-a', str(i['aac']), '-b', str(i['depth']), '-c', str(args.min_depth), '-o', str(o / 'gt.csv')]
+        ))
+        genotypes = ('reconstruct', 'gt.csv')
+
+    filter_args = ['-l', str(args.loci_thresh), '-s', str(args.sample_thresh)]
+    if args.drop_n == True:
+        filter_args.append('--drop_n')
+    stages.append(Stage(
+        'filter', 'filter.py',
+        inputs={'gt': genotypes},
+        outputs=['filtered.csv'],
+        params={'args': filter_args},
+        arguments=lambda i, o: ['-f', str(i['gt']), '-o', str(o / 'filtered.csv')] + filter_args
+    ))
+    filtered = ('filter', 'filtered.csv')
+
+    stages.append(Stage(
+        'jaccard', 'jaccard.py',
+        inputs={'gt': filtered},
+        outputs=['jaccard.dist'],
+        params={},
+        arguments=lambda i, o: ['-f', str(i['gt']), '-o', str(o / 'jaccard.dist'), '-q']
+    ))
+    dist = ('jaccard', 'jaccard.dist')
+
+    groups = {} if args.groups == None else {'groups': args.groups}
+    stages.append(Stage(
+        'pca', 'pca.py',
+        inputs={'dist': dist, **groups},
+        outputs=['pca_results'],
+        params={'title': args.title},
+        arguments=lambda i, o: (
+            ['-f', str(i['dist']), '-o', str(o / 'pca_results'), '--plot_pca', '--pca_title', args.title]
+            + (['--groups', str(i['groups'])] if 'groups' in i else [])
+        )
+    ))
+    stages.append(Stage(
+        'heatmap', 'heatmap.py',
+        inputs={'dist': dist},
+        outputs=['heatmap.png'],
+        params={'title': args.title},
+        arguments=lambda i, o: ['-f', str(i['dist']), '-o', str(o / 'heatmap.png'), '-t', args.title]
+    ))
+    stages.append(Stage(
+        'tree', 'tree.py',
+        inputs={'dist': dist, **groups},
+        outputs=['trees'],
+        params={},
+        arguments=lambda i, o: (
+            ['-f', str(i['dist']), '-o', str(o / 'trees')]
+            + (['--groups', str(i['groups'])] if 'groups' in i else [])
+        )
+    ))
+
+    if args.groups != None:
+        stages.append(Stage(
+            'upset', 'upset.py',
+            inputs={'gt': filtered, 'groups': args.groups},
+            outputs=['upset.png'],
+            params={'title': args.title},
+            arguments=lambda i, o: ['-f', str(i['gt']), '-g', str(i['groups']), '-o', str(o / 'upset.png'), '-t', args.title]
+        ))
+        stages.append(Stage(
+            'popstats', 'popstats.py',
+            inputs={'gt': filtered, 'groups': args.groups},
+            outputs=['popstats.csv', 'popstats_summary.csv', 'fst.dist'],
+            params={},
+            arguments=lambda i, o: [
+                '-f', str(i['gt']), '-g', str(i['groups']),
+                '-o', str(o / 'popstats.csv'),
+                '--summary', str(o / 'popstats_summary.csv'),
+                '--fst', str(o / 'fst.dist')
+            ]
+        ))
+    return stages
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-i', '--input', dest='input', type=Path, required=True, help='Path to folder containing CLC CSVs to summarize')
+    parser.add_argument('-o', '--out_folder', dest='out_folder', type=Path, default=Path('out'), help='Path to the folder to copy the outputs of every stage to')
+    parser.add_argument('--cache', dest='cache', type=Path, default=Path('.pipeline_cache'), help='Path to the folder to cache stage outputs in')
+    parser.add_argument('-j', '--jobs', dest='jobs', type=int, default=os.cpu_count() or 1, help='Maximum number of stages to run at once')
+    parser.add_argument('-c', dest='coverage', type=int, default=10, help='Minimum depth of coverage for summarize_aac.py')
+    parser.add_argument('-n', '--default_name', dest='default_name', type=str, default='', help='Default mapping name for summarize_aac.py')
+    parser.add_argument('--keep_silent', dest='keep_silent', action='store_true', help='Retain silent AA changes in summarize_aac.py')
+    parser.add_argument('-b', '--depth', dest='depth', type=Path, help='samtools depth TSV. If given, reference homozygotes are reconstructed with reconstruct_ref_homs.py')
+    parser.add_argument('--min_depth', dest='min_depth', type=int, default=10, help='Minimum depth for reconstruct_ref_homs.py')
+    parser.add_argument('-l', dest='loci_thresh', type=float, default=0.0, help='Locus threshold for filter.py')
+    parser.add_argument('-s', dest='sample_thresh', type=float, default=0.0, help='Sample threshold for filter.py')
+    parser.add_argument('--drop_n', dest='drop_n', action='store_true', help='Drop loci with N in the reference in filter.py')
+    parser.add_argument('-g', '--groups', dest='groups', type=Path, help='Groups CSV with "sample" and "group" columns. Also enables the upset and popstats stages')
+    parser.add_argument('-t', '--title', dest='title', type=str, default='', help='Title for the plots')
+    args = parser.parse_args()
+
+    try:
+        run_pipeline(workflow(args), args.out_folder, args.cache, jobs=args.jobs)
+    except RuntimeError as err:
+        sys.exit(str(err))
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+# popstats.py
+''' Computes per-locus, per-group population statistics from a genotype table
+(as produced by summarize_aac.py) and a groups CSV (as used by upset.py and
+pca.py). The genotype table is read in chunks and every statistic is
+accumulated in a single pass, so whole-genome tables never need to be held in
+memory at once.
+
+Per locus and per group, the following are reported:
+    n       number of samples with a genotype call
+    missing proportion of the group's samples without a genotype call
+    af      alternate allele frequency
+    ho      observed heterozygosity
+    he      expected heterozygosity, 2p(1-p)
+
+Pairwise Fst between groups is estimated with Hudson's estimator
+(Bhatia et al. 2013), combined across loci as a ratio of averages.
+'''
+
+import argparse
+from pathlib import Path
+
+from aac_popgen.groups import read_groups
+from aac_popgen.popstats import population_stats
+from aac_popgen.profiling import Profiler, add_profile_arguments
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-f', dest='file_in', type=Path, required=True, help='Path to a genotype table')
+    parser.add_argument('-g', '--groups', dest='groups_file', type=Path, required=True, help='Path to a comma delimited file which supplies "sample" and "group" columns')
+    parser.add_argument('-o', dest='file_out', type=Path, default=Path('popstats.csv'), help='Output file for per-locus statistics of every group')
+    parser.add_argument('--summary', dest='summary_out', type=Path, default=Path('popstats_summary.csv'), help='Output file for statistics of every group over all loci')
+    parser.add_argument('--fst', dest='fst_out', type=Path, default=Path('fst.dist'), help='Output file for the pairwise Fst matrix between groups')
+    parser.add_argument('--chunksize', dest='chunksize', type=int, default=100000, help='Number of loci to read and process at a time')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    profiler = Profiler.from_args(args, default=args.file_out)
+
+    groups = read_groups(args.groups_file)
+    summary, fst = population_stats(args.file_in, groups, file_out=args.file_out, chunksize=args.chunksize, profiler=profiler)
+    with profiler.phase('write') as phase:
+        summary.to_csv(args.summary_out)
+        fst.to_csv(args.fst_out)
+    profiler.write()
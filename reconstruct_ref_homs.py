@@ -1,6 +1,8 @@
 import argparse
 
-import pandas as pd
+from aac_popgen.genotypes import read_genotypes
+from aac_popgen.profiling import Profiler, add_profile_arguments
+from aac_popgen.reconstruct import read_depth, reconstruct_ref_homs
 
 
 if __name__ == '__main__':
@@ -9,45 +11,21 @@ if __name__ == '__main__':
     parser.add_argument('-b', dest='depth_tsv', type=str)
     parser.add_argument('-c', dest='min_depth', type=int, default=10)
     parser.add_argument('-o', '--output', dest='file_out', type=str, required=True)
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    aac_df = pd.read_csv(args.unfilled_aac_summary, dtype=str)
-    aac_df.fillna('', inplace=True)
-
-    depth_df = pd.read_csv(
-        args.depth_tsv,
-        dtype=str,
-        delimiter='\t'
-    )
-
-    sample_names = aac_df.columns[5:]
-    depth_names = depth_df.columns[2:]
-    sample_bam_map = {}
-    for sample_name in sample_names:
-        for depth_name in depth_names:
-            if f'{sample_name}.bam' in depth_name:
-                sample_bam_map[sample_name] = depth_name
-                break
-
-    for i, row in aac_df.iterrows():
-        name = row['reference_name']
-
-        # the ref names in the AAC summary can be manipulated here to match the
-        # names in the depth tsv if they don't match
-        stripped_name = name
-        # stripped_name = stripped_name.replace(' ', '').rstrip('mapping')
-
-        pos = str(row['reference_pos'])
-        name_mask = (aac_df['reference_name'] == name)
-        pos_mask = (aac_df['reference_pos'] == pos)
-        aac_mask = name_mask & pos_mask
-        df = depth_df[(depth_df['#CHROM'] == stripped_name) & (depth_df['POS'] == pos)]
-        for sample_name, depth_name in sample_bam_map.items():
-            samtools_depth = int(df[depth_name].iloc[0])
-            genotype = str(aac_df[aac_mask][sample_name].iloc[0])
-            if (genotype == '') and (samtools_depth >= args.min_depth):
-                aac_df.loc[i, sample_name] = '00'
-
-    aac_df.set_index('reference_name', inplace=True)
-    aac_df.to_csv(args.file_out)
+    profiler = Profiler.from_args(args, default=args.file_out)
 
+    with profiler.phase('read') as phase:
+        aac_df = read_genotypes(args.unfilled_aac_summary)
+
+        depth_df = read_depth(args.depth_tsv)
+        phase.count(len(aac_df) + len(depth_df))
+
+    aac_df = reconstruct_ref_homs(aac_df, depth_df, min_depth=args.min_depth, profiler=profiler)
+
+    with profiler.phase('write') as phase:
+        aac_df.set_index('reference_name', inplace=True)
+        aac_df.to_csv(args.file_out)
+        phase.count(len(aac_df))
+    profiler.write()
@@ -3,6 +3,8 @@ import argparse
 
 import pandas as pd
 
+from aac_popgen.profiling import Profiler, add_profile_arguments
+
 
 
 if __name__ == '__main__':
@@ -10,10 +12,15 @@ if __name__ == '__main__':
     parser.add_argument('-f', dest='data_in', required=True)
     parser.add_argument('-g', dest='groups_in', required=True)
     parser.add_argument('-o', dest='out_file', default='')
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
+    profiler = Profiler.from_args(args, default=args.out_file if args.out_file != '' else args.data_in)
+
     # load data to reorder
-    data = pd.read_csv(args.data_in, dtype=str)
+    with profiler.phase('read') as phase:
+        data = pd.read_csv(args.data_in, dtype=str)
+        phase.count(len(data))
 
     # load groups for new sorting
     groups = pd.read_csv(args.groups_in, dtype=str)
@@ -23,7 +30,9 @@ if __name__ == '__main__':
             order.append(sample)
 
     # create the reordered dataframe
-    reordered = data.loc[:, order]
+    with profiler.phase('compute') as phase:
+        reordered = data.loc[:, order]
+        phase.count(len(reordered))
 
     # write out the new dataframe
     if args.out_file == '':
@@ -32,4 +41,8 @@ if __name__ == '__main__':
     else:
         out_file = args.out_file
 
-    reordered.to_csv(out_file, index=False)
+    with profiler.phase('write') as phase:
+        reordered.to_csv(out_file, index=False)
+        phase.count(len(reordered))
+
+    profiler.write()
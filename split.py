@@ -1,6 +1,8 @@
 import argparse
 import csv
 
+from aac_popgen.profiling import Profiler, add_profile_arguments
+
 
 
 if __name__ == '__main__':
@@ -8,8 +10,11 @@ if __name__ == '__main__':
     parser.add_argument('-f', dest='genotype_file_in', type=str)
     parser.add_argument('--fs_stop', dest='fs_stop_out', type=str)
     parser.add_argument('--nonsyn', dest='nonsynonymous_out', type=str)
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
+    profiler = Profiler.from_args(args, default=args.genotype_file_in)
+
 
     fin = open(args.genotype_file_in, 'r')
     fs_out = open(args.fs_stop_out, 'w', newline='')
@@ -22,15 +27,19 @@ if __name__ == '__main__':
     fs_writer.writeheader()
     ns_writer.writeheader()
 
-    for row in reader:
-        if len(row['amino_acid_change']) < 2 or row['amino_acid_change'] == '':
-            continue
+    with profiler.phase('compute') as phase:
+        for row in reader:
+            phase.count(1)
+            if len(row['amino_acid_change']) < 2 or row['amino_acid_change'] == '':
+                continue
 
-        if (row['amino_acid_change'][-2:] == 'fs') or row['amino_acid_change'][-1] == '*':
-            fs_writer.writerow(row)
-        else:
-            ns_writer.writerow(row)
+            if (row['amino_acid_change'][-2:] == 'fs') or row['amino_acid_change'][-1] == '*':
+                fs_writer.writerow(row)
+            else:
+                ns_writer.writerow(row)
 
     fin.close()
     fs_out.close()
     ns_out.close()
+
+    profiler.write()
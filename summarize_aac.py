@@ -7,23 +7,10 @@ in the CSVs.
 '''
 
 import argparse
-import csv
-import gzip
 from pathlib import Path
 
-
-def open_csv(
-        filename: Path,
-        *,
-        newline: 'Union[None,str]'=None
-        ) -> 'io.TextWrapper':
-    ''' Open `filename` with gzip if it seems compressed,
-    otherwise just open the file.'''
-    if '.gz' in filename.suffixes:
-        fin = gzip.open(filename, mode='rt', newline=newline)
-    else:
-        fin = open(filename, newline=newline)
-    return fin
+from aac_popgen.clc import summarize_files, write_summary
+from aac_popgen.profiling import Profiler, add_profile_arguments
 
 
 if __name__ == '__main__':
@@ -85,98 +72,19 @@ if __name__ == '__main__':
         dest='keep_silent',
         help='Set this flag to retain silent AA changes'
     )
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    coverage_cutoff = args.coverage
-    show_in_depth = args.indepth
-    keep_silent = args.keep_silent
+    profiler = Profiler.from_args(args, default=args.output)
 
     filenames = list(Path(args.input).iterdir())
-    headers = [
-        'reference_name',
-        'reference_pos',
-        'reference_allele',
-        'sample_allele',
-        'amino_acid_change'
-    ]
-
-    header_friendly_filenames = [str(Path(f).stem) for f in filenames]
-    headers.extend(sorted(header_friendly_filenames))
-
-    changes = {}
-    for filename in filenames:
-        with open_csv(filename, newline='') as fin:
-            reader = csv.DictReader(fin, delimiter=',', quotechar='"')
-            for row in reader:
-                coverage = int(row.get('Coverage', 0))
-                if coverage < coverage_cutoff:
-                    continue
-
-                amino_change = row.get('Amino acid change', '')
-                if (keep_silent is False) and (amino_change == ''):
-                    continue
-                amino_change = amino_change.split('p.')[-1].strip('[]')
-
-                mapping_name = row.get('Mapping', '')
-                if mapping_name == '':
-                        mapping_name = args.default_name
-
-                info = {
-                    'reference_name': mapping_name,
-                    'reference_pos': row.get('Reference Position'),
-                    'reference_allele': row.get('Reference'),
-                    'sample_allele': row.get('Allele'),
-                    'amino_acid_change': amino_change
-                }
-
-                # change the pertinent info into a hashable type
-                info_hash = tuple(info.values())
-
-                zygosity = row.get('Zygosity', 'N/A')[:3]
-                count = int(row.get('Count', 0))
-                frequency = round(float(row.get('Frequency', 0)), 3)
-                in_depth = f'{zygosity}:{count}/{coverage}({frequency})'
-
-                if changes.get(mapping_name) == None:
-                    changes[mapping_name] = {}
-
-                if info_hash not in changes[mapping_name]:
-                    changes[mapping_name][info_hash] = info
-
-                if show_in_depth:
-                    changes[mapping_name][info_hash][str(Path(filename).stem)] = in_depth
-                else:
-                    if zygosity == 'Hom':
-                        symbol = '11'
-                    else:
-                        symbol = '10'
-                    changes[mapping_name][info_hash][str(Path(filename).stem)] = symbol
-
-    with open(args.output, 'w', newline='') as fout:
-        writer = csv.DictWriter(fout, fieldnames=headers, quotechar='"')
-        writer.writeheader()
-        sorted_mapping_names = sorted(list(changes.keys()))
-        for mapping_name in sorted_mapping_names:
-            by_mapping = changes[mapping_name]
-            hashes_by_ref_pos = sorted(by_mapping, key=lambda x: int(x[1]))
-            if args.split == True:
-                split_fn = str(args.output).rstrip('.csv')
-                split_fn += '_'
-                split_fn += mapping_name.replace(' ', '_')
-                split_fn += '.csv'
-                split_out = open(split_fn, 'w', newline='')
-                split_writer = csv.DictWriter(
-                    split_out,
-                    fieldnames=headers,
-                    quotechar='"'
-                )
-                split_writer.writeheader()
-            for info_hash in hashes_by_ref_pos:
-                row = changes[mapping_name][info_hash]
-                writer.writerow(row)
-                if args.split == True:
-                    split_writer.writerow(row)
-            if args.split == True:
-                split_out.close()
-
-
+    headers, changes = summarize_files(
+        filenames,
+        coverage_cutoff=args.coverage,
+        keep_silent=args.keep_silent,
+        default_name=args.default_name,
+        show_in_depth=args.indepth,
+        profiler=profiler
+    )
+    write_summary(args.output, headers, changes, split=args.split, profiler=profiler)
+    profiler.write()
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+# synthesize.py
+''' Generates a synthetic data set resembling the real inputs of this project,
+for benchmarking and testing at scales the example data cannot reach:
+
+    aac_csv/    one CLC amino acid changes export per sample (optionally gzipped)
+    depth.tsv   a samtools depth style table of read depth at every locus
+    gt.csv      the genotype table summarize_aac.py and reconstruct_ref_homs.py
+                would produce from the above
+    groups.csv  a groups CSV assigning the samples to groups
+
+Every locus has its own alternate allele frequency. A sample is missing at a
+locus with probability `missing` (it then has too little coverage to be
+reported), and is otherwise heterozygous with probability `het`, or homozygous
+for the alternate or reference allele according to the locus' frequency.
+'''
+
+import argparse
+import csv
+import gzip
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+
+
+CLC_HEADERS = [
+    'Mapping',
+    'Reference Position',
+    'Type',
+    'Length',
+    'Reference',
+    'Allele',
+    'Linkage',
+    'Zygosity',
+    'Count',
+    'Coverage',
+    'Frequency',
+    'Forward/reverse balance',
+    'Average quality',
+    'Overlapping annotations',
+    'Coding region change',
+    'Amino acid change'
+]
+BASES = np.array(['A', 'C', 'G', 'T'])
+AMINO_ACIDS = np.array(['Ala', 'Arg', 'Asn', 'Asp', 'Cys', 'Gln', 'Glu', 'Gly', 'His', 'Ile', 'Leu', 'Lys', 'Met', 'Phe', 'Pro', 'Ser', 'Thr', 'Trp', 'Tyr', 'Val'])
+# genotype codes, as in the genotype table
+MISSING, REF_HOM, HET, ALT_HOM = 0, 1, 2, 3
+GENOTYPE_SYMBOLS = np.array(['', '00', '10', '11'], dtype=object)
+
+
+def synthesize(
+        out_folder: Union[str, Path],
+        samples: int,
+        loci: int,
+        *,
+        references: int=1,
+        groups: int=3,
+        missing: float=0.1,
+        het: float=0.2,
+        silent: float=0.3,
+        min_coverage: int=10,
+        compress: bool=False,
+        seed: int=42
+        ):
+    ''' Writes a synthetic data set of `samples` samples and `loci` loci to
+    `out_folder`. `silent` is the proportion of loci without an amino acid
+    change, and `min_coverage` the coverage below which a sample is treated as
+    missing at a locus.'''
+    rng = np.random.default_rng(seed)
+    out_folder = Path(out_folder)
+    aac_folder = out_folder / 'aac_csv'
+    aac_folder.mkdir(parents=True, exist_ok=True)
+
+    width = len(str(samples))
+    names = [f'S{i:0{width}d}' for i in range(1, samples + 1)]
+    # summarize_aac.py names sample columns after the export's name without its
+    # last suffix, which leaves .csv on gzipped exports, and the other tables
+    # must use the same column names to match
+    columns = [f'{name}.csv' if compress == True else name for name in names]
+
+    # loci are spread evenly over the references, sorted by position
+    ref_names = np.array([f'ref{i}' for i in range(1, references + 1)])
+    ref_of = np.sort(rng.integers(0, references, size=loci))
+    positions = np.zeros(loci, dtype=np.int64)
+    for r in range(references):
+        in_ref = ref_of == r
+        positions[in_ref] = np.sort(rng.choice(np.arange(1, 10 * loci + 1), size=in_ref.sum(), replace=False))
+    ref_allele = rng.integers(0, 4, size=loci)
+    alt_allele = (ref_allele + rng.integers(1, 4, size=loci)) % 4
+    is_silent = rng.random(loci) < silent
+    aa_pos = positions // 3 + 1
+    aa_from = AMINO_ACIDS[rng.integers(0, len(AMINO_ACIDS), size=loci)]
+    aa_to = AMINO_ACIDS[rng.integers(0, len(AMINO_ACIDS), size=loci)]
+    changes = np.where(is_silent, '', np.char.add(np.char.add(aa_from, aa_pos.astype(str)), aa_to))
+
+    # genotypes, loci x samples
+    freq = rng.beta(0.5, 0.5, size=loci)[:, None]
+    draw = rng.random((loci, samples))
+    genotypes = np.where(draw < het, HET, np.where(rng.random((loci, samples)) < freq, ALT_HOM, REF_HOM))
+    genotypes[rng.random((loci, samples)) < missing] = MISSING
+    coverage = np.where(
+        genotypes == MISSING,
+        rng.integers(0, max(min_coverage, 1), size=(loci, samples)),
+        rng.integers(min_coverage, 20 * min_coverage + 1, size=(loci, samples))
+    )
+
+    for s, name in enumerate(names):
+        filename = aac_folder / f'{name}.csv'
+        if compress == True:
+            fout = gzip.open(filename.with_suffix('.csv.gz'), 'wt', newline='')
+        else:
+            fout = open(filename, 'w', newline='')
+        with fout:
+            writer = csv.writer(fout, quoting=csv.QUOTE_ALL)
+            writer.writerow(CLC_HEADERS)
+            for l in np.flatnonzero((genotypes[:, s] == HET) | (genotypes[:, s] == ALT_HOM)):
+                cov = int(coverage[l, s])
+                if genotypes[l, s] == HET:
+                    zygosity = 'Heterozygous'
+                    count = int(cov * rng.uniform(0.3, 0.7))
+                else:
+                    zygosity = 'Homozygous'
+                    count = int(cov * rng.uniform(0.9, 1.0))
+                change = f'REF:p.[{changes[l]}]' if changes[l] != '' else ''
+                writer.writerow([
+                    ref_names[ref_of[l]],
+                    positions[l],
+                    'SNV',
+                    1,
+                    BASES[ref_allele[l]],
+                    BASES[alt_allele[l]],
+                    '',
+                    zygosity,
+                    count,
+                    cov,
+                    round(100 * count / max(cov, 1), 4),
+                    round(rng.uniform(0.3, 0.5), 4),
+                    round(rng.uniform(30, 40), 4),
+                    '',
+                    f'REF:c.{positions[l]}{BASES[ref_allele[l]]}>{BASES[alt_allele[l]]}',
+                    change
+                ])
+
+    with open(out_folder / 'depth.tsv', 'w', newline='') as fout:
+        writer = csv.writer(fout, delimiter='\t')
+        writer.writerow(['#CHROM', 'POS'] + [f'{column}.bam' for column in columns])
+        for l in range(loci):
+            writer.writerow([ref_names[ref_of[l]], positions[l]] + coverage[l].tolist())
+
+    with open(out_folder / 'gt.csv', 'w', newline='') as fout:
+        writer = csv.writer(fout)
+        writer.writerow(['reference_name', 'reference_pos', 'reference_allele', 'sample_allele', 'amino_acid_change'] + columns)
+        symbols = GENOTYPE_SYMBOLS[genotypes]
+        for l in range(loci):
+            writer.writerow([
+                ref_names[ref_of[l]],
+                positions[l],
+                BASES[ref_allele[l]],
+                BASES[alt_allele[l]],
+                changes[l]
+            ] + symbols[l].tolist())
+
+    with open(out_folder / 'groups.csv', 'w', newline='') as fout:
+        writer = csv.writer(fout)
+        writer.writerow(['sample', 'group'])
+        for s, column in enumerate(columns):
+            writer.writerow([column, f'group{s % groups + 1}'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-o', '--out_folder', dest='out_folder', type=Path, required=True, help='Folder to write the synthetic data set to')
+    parser.add_argument('-n', '--samples', dest='samples', type=int, default=10, help='Number of samples')
+    parser.add_argument('-l', '--loci', dest='loci', type=int, default=1000, help='Number of variant loci')
+    parser.add_argument('-r', '--references', dest='references', type=int, default=1, help='Number of reference sequences the loci are spread over')
+    parser.add_argument('-g', '--groups', dest='groups', type=int, default=3, help='Number of groups to assign the samples to')
+    parser.add_argument('-m', '--missing', dest='missing', type=float, default=0.1, help='Probability a sample has no genotype at a locus')
+    parser.add_argument('--het', dest='het', type=float, default=0.2, help='Probability a called genotype is heterozygous')
+    parser.add_argument('--silent', dest='silent', type=float, default=0.3, help='Proportion of loci without an amino acid change')
+    parser.add_argument('-c', dest='min_coverage', type=int, default=10, help='Coverage below which a sample is missing at a locus')
+    parser.add_argument('-z', '--gzip', dest='compress', action='store_true', help='Gzip the CLC exports')
+    parser.add_argument('--seed', dest='seed', type=int, default=42)
+    args = parser.parse_args()
+
+    synthesize(
+        args.out_folder,
+        args.samples,
+        args.loci,
+        references=args.references,
+        groups=args.groups,
+        missing=args.missing,
+        het=args.het,
+        silent=args.silent,
+        min_coverage=args.min_coverage,
+        compress=args.compress,
+        seed=args.seed
+    )
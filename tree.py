@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# tree.py
+''' Builds trees from a pairwise distance file (as produced by jaccard.py) and
+writes them in Newick format. Two trees can be built:
+
+    upgma   a rooted, ultrametric average-linkage tree
+            (https://en.wikipedia.org/wiki/UPGMA)
+    nj      an unrooted neighbour-joining tree
+            (https://en.wikipedia.org/wiki/Neighbor_joining)
+
+In practice both run in roughly quadratic time rather than the cubic time of the
+textbook algorithms, so they remain practical for tens of thousands of samples.
+Leaves can be annotated with their group from a groups CSV as NHX comments.
+'''
+
+import argparse
+from pathlib import Path
+
+from aac_popgen.genotypes import read_dist
+from aac_popgen.groups import read_sample_groups
+from aac_popgen.profiling import Profiler, add_profile_arguments
+from aac_popgen.tree import neighbor_joining, to_newick, upgma
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-f', '--dist_file', dest='file_in', type=Path, required=True, metavar='PATH/TO/DISTFILE', help='Path to a comma delimited pairwise distance matrix file with a "sample" column and a column for every sample')
+    parser.add_argument('-o', '--out_folder', dest='out_folder', type=Path, default='out', metavar='PATH/TO/OUTFOLDER/', help='Path to the folder to output the Newick files to. Will create the folder if it does not yet exist')
+    parser.add_argument('-m', '--method', dest='method', choices=['upgma', 'nj', 'both'], default='both', help='Which tree(s) to build')
+    parser.add_argument('--groups', dest='groups_file', type=Path, metavar='PATH/TO/GROUPS.csv', help='Annotate leaves with the group from a comma delimited file which supplies "sample" and "group" columns')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    out_folder = args.out_folder
+    out_folder.mkdir(exist_ok=True)
+
+    profiler = Profiler.from_args(args, default=out_folder / 'tree')
+
+    with profiler.phase('read') as phase:
+        groups = None
+        if args.groups_file != None:
+            groups = read_sample_groups(args.groups_file)
+
+        df = read_dist(args.file_in)
+        dist = df.to_numpy()
+        labels = [str(s) for s in df.index]
+        phase.count(len(df))
+
+    for method, build in (('upgma', upgma), ('nj', neighbor_joining)):
+        if args.method not in (method, 'both'):
+            continue
+        with profiler.phase(method) as phase:
+            tree, root = build(dist)
+            phase.count(len(dist))
+        with profiler.phase('write') as phase:
+            with open(out_folder / f'{method}.nwk', 'w') as fout:
+                fout.write(to_newick(tree, root, labels, groups) + '\n')
+            phase.count(len(tree))
+
+    profiler.write()
@@ -1,10 +1,9 @@
 
 import argparse
-import csv
 
-import matplotlib.pyplot as plt
-import pandas as pd
-import upsetplot
+from aac_popgen.genotypes import read_genotypes
+from aac_popgen.groups import allele_membership, read_groups
+from aac_popgen.profiling import Profiler, add_profile_arguments
 
 
 if __name__ == '__main__':
@@ -14,45 +13,37 @@ if __name__ == '__main__':
     parser.add_argument('-v', '--vertical', dest='vert_orientation', action='store_true')
     parser.add_argument('-t', '--title', dest='title', type=str, default='')
     parser.add_argument('-o', '--output', dest='output', type=str)
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
+    profiler = Profiler.from_args(args, default=args.output if args.output != None else 'upset')
+
     orientation = 'horizontal' if not args.vert_orientation else 'vertical'
 
-    df = pd.read_csv(args.file_in, dtype=str)
-
-    categories = {}
-    with open(args.groups_file, 'r') as fin:
-        reader = csv.DictReader(fin)
-        for row in reader:
-            if row['group'] not in categories:
-                categories[row['group']] = []
-            categories[row['group']].append(row['sample'])
-    remove_groups = []
-    for group, samples in categories.items():
-        if len(list(df.columns.intersection(samples))) == 0:
-            remove_groups.append(group)
-    for rg in remove_groups:
-        del categories[rg]
-
-    membership = {cat: set() for cat in categories}
-
-    for idx in df.index:
-        for cat, samples in categories.items():
-            values = df.loc[idx, df.columns.intersection(samples)].values
-            if '11' in values or '10' in values:
-                pos = df.loc[idx, 'reference_pos']
-                ref = df.loc[idx, 'reference_allele']
-                mut = df.loc[idx, 'sample_allele']
-                membership[cat].add(f'{pos}_{ref}>{mut}')
-
-    data = upsetplot.from_contents(membership)
-
-    fig, ax = plt.subplots(figsize=(5, 5), dpi=300)
-    ax.axis('off')
-    ax.set_title(args.title, y=1.05)
-    upsetplot.plot(data, fig=fig, orientation=orientation, show_counts=True)
-
-    if args.output == None:
-        plt.show()
-    else:
-        plt.savefig(args.output)
+    with profiler.phase('read') as phase:
+        df = read_genotypes(args.file_in)
+        phase.count(len(df))
+
+    categories = read_groups(args.groups_file)
+
+    with profiler.phase('compute') as phase:
+        membership = allele_membership(df, categories)
+        phase.count(len(df))
+
+    with profiler.phase('render') as phase:
+        import matplotlib.pyplot as plt
+        import upsetplot
+
+        data = upsetplot.from_contents(membership)
+
+        fig, ax = plt.subplots(figsize=(5, 5), dpi=300)
+        ax.axis('off')
+        ax.set_title(args.title, y=1.05)
+        upsetplot.plot(data, fig=fig, orientation=orientation, show_counts=True)
+
+        if args.output == None:
+            plt.show()
+        else:
+            plt.savefig(args.output)
+
+    profiler.write()